@@ -5,7 +5,10 @@ Modular and clean implementation with live updates
 
 import streamlit as st
 import pandas as pd
-from scraper import scrape_daraz
+import sqlite3
+import os
+from scraper import scrape_sites
+from store import RESULTS_DB, list_watchlists, load_products
 from ui_components import (
     apply_custom_css,
     render_header,
@@ -13,7 +16,8 @@ from ui_components import (
     render_statistics,
     render_results_table,
     render_download_button,
-    render_welcome_screen
+    render_welcome_screen,
+    render_watchlists
 )
 
 # Page configuration
@@ -31,12 +35,14 @@ apply_custom_css()
 render_header()
 
 # Render sidebar and get user inputs
-search_query, max_pages, search_button = render_sidebar()
+search_query, sites, max_pages, search_button = render_sidebar()
 
 # Main content area
 if search_button:
     if not search_query:
         st.warning("Please enter a product name to search")
+    elif not sites:
+        st.warning("Please select at least one Daraz site")
     else:
         # Create placeholders for live updates
         status_placeholder = st.empty()
@@ -63,8 +69,9 @@ if search_button:
         
         try:
             # Call scraper with progress callback
-            results = scrape_daraz(
+            results = scrape_sites(
                 search_query=search_query,
+                sites=sites,
                 max_results=1000,
                 max_pages=max_pages,
                 progress_callback=update_progress
@@ -105,4 +112,21 @@ if search_button:
 else:
     # Show welcome screen
     render_welcome_screen()
+    
+    # Show results collected by the scheduler (only once it has created the store,
+    # so rendering the page never creates the database itself)
+    if os.path.exists(RESULTS_DB):
+        try:
+            watchlists = list_watchlists()
+            if watchlists:
+                selected = render_watchlists(watchlists)
+                if selected:
+                    products = load_products(selected['query'])
+                    if products:
+                        df = render_results_table(pd.DataFrame(products))
+                        render_download_button(df, selected['query'])
+                    else:
+                        st.info("No results yet for this watchlist")
+        except sqlite3.Error as e:
+            st.warning(f"Could not read watchlists: {e}")
 
@@ -0,0 +1,113 @@
+"""
+Product Extraction for Daraz result pages
+Reads product cards from a live Selenium driver or a saved page (HtmlPage in
+snapshots.py). Kept free of the browser stack so offline replay stays light
+"""
+
+from sites import DEFAULT_SITE, get_site
+import re
+
+
+# Selenium locator strategies (the values of selenium's By.*; importing By
+# would load the whole webdriver package)
+CSS_SELECTOR = "css selector"
+TAG_NAME = "tag name"
+XPATH = "xpath"
+
+
+def extract_products_from_page(driver, site=None):
+    """
+    Extract products from the current page
+    
+    Args:
+        driver: Selenium WebDriver instance or HtmlPage
+        site: Site definition from sites.py (default: Daraz Nepal)
+        
+    Returns:
+        List of dictionaries with product info (name, price, sold, link)
+    """
+    site = site or get_site(DEFAULT_SITE)
+    products = []
+    
+    # Try to find products using different selectors
+    product_elements = []
+    for selector in site["product_selectors"]:
+        try:
+            elements = driver.find_elements(CSS_SELECTOR, selector)
+        except:
+            continue
+        if len(elements) > 5:
+            product_elements = elements
+            break
+        # Few cards (e.g. last page): keep the first selector that matched anything
+        if elements and not product_elements:
+            product_elements = elements
+    
+    # Extract information from each product
+    for product in product_elements:
+        try:
+            # Extract product name
+            name = None
+            try:
+                name_elem = product.find_element(CSS_SELECTOR, site["name_selector"])
+                name = name_elem.text.strip() or name_elem.get_attribute("title")
+            except:
+                try:
+                    links = product.find_elements(TAG_NAME, "a")
+                    for link in links:
+                        name = link.text.strip() or link.get_attribute("title")
+                        if name and len(name) > 10:
+                            break
+                except:
+                    pass
+            
+            # Extract price
+            price = None
+            try:
+                price_elem = product.find_element(CSS_SELECTOR, site["price_selector"])
+                price = price_elem.text.strip()
+            except:
+                # Try to find price in all text
+                try:
+                    all_text = product.text
+                    price_match = re.search(site["price_pattern"], all_text)
+                    if price_match:
+                        price = price_match.group(0)
+                except:
+                    pass
+            
+            # Extract product link (identifies the listing across runs)
+            link = None
+            try:
+                link_elem = product.find_element(CSS_SELECTOR, site["link_selector"])
+                link = link_elem.get_attribute("href")
+            except:
+                pass
+            
+            # Extract sold information
+            sold = "N/A"
+            try:
+                sold_elem = product.find_element(CSS_SELECTOR, site["sold_selector"])
+                sold = sold_elem.text.strip()
+            except:
+                try:
+                    all_text = product.text
+                    sold_match = re.search(r'(\d+\.?\d*[km]?\+?)\s*(sold|orders?)', all_text, re.IGNORECASE)
+                    if sold_match:
+                        sold = sold_match.group(0)
+                except:
+                    pass
+            
+            # Only add if we have name and price
+            if name and price:
+                products.append({
+                    'name': name,
+                    'price': price,
+                    'sold': sold,
+                    'link': link
+                })
+        except Exception as e:
+            print(f"Error extracting product: {e}")
+            continue
+    
+    return products
@@ -0,0 +1,385 @@
+"""
+Fetch Policy for Daraz page loads
+Classifies every page load, retries with jittered backoff and pauses a host
+when it keeps blocking us
+"""
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from memory_guard import SHARED_STATE_DIR
+from urllib.parse import urlparse
+import threading
+import random
+import time
+import os
+import re
+
+
+# Possible outcomes of a page load
+OUTCOME_OK = "ok"
+OUTCOME_EMPTY = "empty"
+OUTCOME_BLOCKED = "blocked"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_CRASH = "crash"
+
+OUTCOMES = [OUTCOME_OK, OUTCOME_EMPTY, OUTCOME_BLOCKED, OUTCOME_TIMEOUT, OUTCOME_CRASH]
+
+# Retry settings per outcome: (base delay, max delay, retries)
+# For crashes "retries" is how many times the caller may restart the driver
+DEFAULT_RETRY_RULES = {
+    OUTCOME_EMPTY: (2, 8, 1),
+    OUTCOME_BLOCKED: (10, 60, 2),
+    OUTCOME_TIMEOUT: (3, 30, 3),
+    OUTCOME_CRASH: (5, 30, 1),
+}
+
+# Anti-bot interstitials redirect to URLs like these
+BLOCK_URL_MARKERS = [
+    "/_____tmd_____/punish",
+    "x5secdata",
+    "baxia-punish",
+]
+
+# Titles of captcha / anti-bot pages
+BLOCK_TITLE_MARKERS = [
+    "captcha",
+    "slide to verify",
+    "access denied",
+    "unusual traffic",
+]
+
+# Captcha widgets (slider captcha and the punish dialog)
+BLOCK_SELECTORS = [
+    "#nc_1_n1z",
+    "#nocaptcha",
+    ".nc-container",
+    "#baxia-punish",
+    ".baxia-dialog",
+    "iframe[src*='_____tmd_____/punish']",
+]
+
+# Error messages Chrome gives when the renderer dies
+CRASH_MARKERS = [
+    "tab crashed",
+    "page crash",
+    "session deleted",
+    "chrome not reachable",
+    "invalid session id",
+]
+
+
+def classify_exception(error):
+    """
+    Map an exception raised during navigation to an outcome
+
+    Args:
+        error: Exception raised by Selenium
+
+    Returns:
+        One of the OUTCOME_* constants
+    """
+    if isinstance(error, TimeoutException):
+        return OUTCOME_TIMEOUT
+
+    message = str(error).lower()
+    if any(marker in message for marker in CRASH_MARKERS):
+        return OUTCOME_CRASH
+    if "timeout" in message or "timed out" in message:
+        return OUTCOME_TIMEOUT
+    if isinstance(error, WebDriverException):
+        return OUTCOME_CRASH
+    return OUTCOME_TIMEOUT
+
+
+def is_blocked_page(driver):
+    """
+    Check if the current page is a captcha or anti-bot interstitial
+
+    Only the URL, the title and captcha widgets are checked: the page source
+    is full of scripts and config that mention "captcha" on normal pages.
+    """
+    try:
+        url = (driver.current_url or "").lower()
+        title = (driver.title or "").lower()
+        if any(marker in url for marker in BLOCK_URL_MARKERS):
+            return True
+        if any(marker in title for marker in BLOCK_TITLE_MARKERS):
+            return True
+        return bool(driver.find_elements(By.CSS_SELECTOR, ", ".join(BLOCK_SELECTORS)))
+    except Exception:
+        return False
+
+
+def backoff_delay(base, max_delay, attempt):
+    """
+    Jittered exponential backoff
+
+    Args:
+        base: Delay for the first retry in seconds
+        max_delay: Upper bound for the delay in seconds
+        attempt: Retry number starting at 0
+
+    Returns:
+        Seconds to sleep (between half and all of the exponential delay)
+    """
+    delay = min(max_delay, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker
+
+    After `threshold` blocked loads in a row the host is paused for `cooldown`
+    seconds. Timeouts don't count: one slow URL shouldn't pause every scrape
+    of the host. Scrapes call `wait()` before they start a browser, so
+    queued scrapes sleep without holding one; a scrape already running stops
+    loading pages from a paused host. After the pause one load is let through
+    to probe the host.
+
+    The pause is also written to SHARED_STATE_DIR, so a block seen by the
+    scheduler pauses the Streamlit app's scrapes too (and the other way round).
+    """
+
+    def __init__(self, threshold=3, cooldown=120, host=""):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0
+        self.lock = threading.Lock()
+        safe_host = re.sub(r'[^A-Za-z0-9.-]', '_', host) or "default"
+        self.state_path = os.path.join(SHARED_STATE_DIR, f"breaker-{safe_host}")
+
+    def _shared_open_until(self):
+        """Pause end time written by any process, 0 if none"""
+        try:
+            with open(self.state_path) as f:
+                return float(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _write_open_until(self):
+        try:
+            os.makedirs(SHARED_STATE_DIR, exist_ok=True)
+            tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(str(self.open_until))
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"Error saving circuit breaker state: {e}")
+
+    def is_open(self):
+        """Check if the host is currently paused"""
+        return self.remaining() > 0
+
+    def remaining(self):
+        """Seconds left until the host is available again"""
+        with self.lock:
+            open_until = max(self.open_until, self._shared_open_until())
+        return max(0, open_until - time.time())
+
+    def wait(self, status_callback=None):
+        """Block until the host is available again"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            return
+        message = f"Site is blocking requests, pausing for {int(remaining)}s..."
+        print(message)
+        if status_callback:
+            status_callback(message)
+        time.sleep(remaining)
+
+    def record(self, outcome):
+        """Update the breaker with the outcome of a page load"""
+        with self.lock:
+            if outcome == OUTCOME_BLOCKED:
+                self.failures += 1
+                if self.failures >= self.threshold:
+                    self.open_until = time.time() + self.cooldown
+                    self._write_open_until()
+                    # Half-open: a single failure after the pause trips it again
+                    self.failures = self.threshold - 1
+            elif outcome != OUTCOME_TIMEOUT:
+                self.failures = 0
+
+
+# Breakers are shared by every scrape in this process (pauses also across processes)
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(host, threshold=3, cooldown=120):
+    """Get the shared circuit breaker for a host"""
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(threshold, cooldown, host)
+        return _breakers[host]
+
+
+class FetchPolicy:
+    """
+    Central policy for loading pages
+
+    Every page load goes through `fetch()` (navigate to a URL) or `check()`
+    (classify a page that was reached by clicking). Outcomes are counted so
+    the scraper can report how a run went.
+    """
+
+    def __init__(self, retry_rules=None, wait_timeout=15, breaker_threshold=3,
+                 breaker_cooldown=120, status_callback=None, abort_after=4, abort_rate=0.5):
+        self.retry_rules = dict(DEFAULT_RETRY_RULES)
+        if retry_rules:
+            self.retry_rules.update(retry_rules)
+        self.wait_timeout = wait_timeout
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.status_callback = status_callback
+        self.abort_after = abort_after
+        self.abort_rate = abort_rate
+        self.counts = {outcome: 0 for outcome in OUTCOMES}
+
+    def breaker_for(self, url):
+        """Get the circuit breaker for the host of a URL"""
+        host = urlparse(url).netloc
+        return get_breaker(host, self.breaker_threshold, self.breaker_cooldown)
+
+    def record(self, url, outcome):
+        """Count an outcome and feed it to the host's breaker"""
+        self.counts[outcome] += 1
+        self.breaker_for(url).record(outcome)
+
+    def classify(self, driver, ready_selector=None):
+        """
+        Classify the page currently loaded in the driver
+
+        Args:
+            driver: Selenium WebDriver instance
+            ready_selector: CSS selector that must match for the page to count
+                as loaded (None accepts any page that isn't blocked)
+
+        Returns:
+            One of the OUTCOME_* constants
+        """
+        try:
+            if ready_selector:
+                try:
+                    WebDriverWait(driver, self.wait_timeout).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, ready_selector))
+                    )
+                except TimeoutException:
+                    pass
+
+            if is_blocked_page(driver):
+                return OUTCOME_BLOCKED
+            if ready_selector and not driver.find_elements(By.CSS_SELECTOR, ready_selector):
+                return OUTCOME_EMPTY
+            return OUTCOME_OK
+        except Exception as e:
+            return classify_exception(e)
+
+    def check(self, driver, ready_selector=None):
+        """Classify and record the current page without navigating"""
+        try:
+            url = driver.current_url
+        except Exception as e:
+            outcome = classify_exception(e)
+            self.counts[outcome] += 1
+            return outcome
+
+        outcome = self.classify(driver, ready_selector)
+        self.record(url, outcome)
+        return outcome
+
+    def backoff(self, outcome, attempt):
+        """
+        Sleep before retrying after an outcome
+
+        Args:
+            outcome: Outcome of the failed attempt
+            attempt: Retry number starting at 0
+
+        Returns:
+            False if the retries for this outcome are used up (no sleep)
+        """
+        base, max_delay, retries = self.retry_rules[outcome]
+        if attempt >= retries:
+            return False
+
+        delay = backoff_delay(base, max_delay, attempt)
+        print(f"Page load {outcome}, retrying in {delay:.1f}s...")
+        if self.status_callback:
+            self.status_callback(f"Page load {outcome}, retrying in {int(delay)}s...")
+        time.sleep(delay)
+        return True
+
+    def fetch(self, driver, url, ready_selector=None):
+        """
+        Load a URL, retrying with backoff depending on how it failed
+
+        A crash is returned straight away without retrying: the session is
+        dead, so the caller has to start a new driver (see `backoff()` for
+        how many restarts the crash rule allows).
+
+        Args:
+            driver: Selenium WebDriver instance
+            url: Page to load
+            ready_selector: CSS selector that must match for the page to count
+                as loaded
+
+        Returns:
+            Outcome of the last attempt (OUTCOME_OK on success)
+        """
+        breaker = self.breaker_for(url)
+        attempt = 0
+
+        # Don't keep a browser waiting on a paused host
+        if breaker.is_open():
+            print(f"Host paused by circuit breaker, not loading {url}")
+            self.counts[OUTCOME_BLOCKED] += 1
+            return OUTCOME_BLOCKED
+
+        while True:
+            try:
+                driver.get(url)
+                outcome = self.classify(driver, ready_selector)
+            except Exception as e:
+                outcome = classify_exception(e)
+
+            self.record(url, outcome)
+            if outcome in (OUTCOME_OK, OUTCOME_CRASH):
+                return outcome
+
+            # This load paused the host: give up now instead of sleeping for a retry
+            if breaker.is_open():
+                print(f"Host paused by circuit breaker, giving up on {url}: {outcome}")
+                return outcome
+
+            if not self.backoff(outcome, attempt):
+                print(f"Giving up on {url} after {attempt + 1} attempt(s): {outcome}")
+                return outcome
+            attempt += 1
+
+    def should_abort(self):
+        """
+        Check if this scrape is mostly hitting blocks and timeouts
+
+        Once `abort_after` loads have been made and more than `abort_rate` of
+        them were blocked or timed out, carrying on only burns browser time.
+        """
+        if sum(self.counts.values()) < self.abort_after:
+            return False
+        rates = self.rates()
+        return rates[OUTCOME_BLOCKED] + rates[OUTCOME_TIMEOUT] > self.abort_rate
+
+    def rates(self):
+        """Fraction of page loads that ended in each outcome"""
+        total = sum(self.counts.values())
+        if total == 0:
+            return {outcome: 0.0 for outcome in OUTCOMES}
+        return {outcome: count / total for outcome, count in self.counts.items()}
+
+    def summary(self):
+        """One line summary of the outcome counts"""
+        return ", ".join(f"{outcome}={count}" for outcome, count in self.counts.items())
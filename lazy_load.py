@@ -0,0 +1,98 @@
+"""
+Lazy-load aware card collection
+Scrolls a results page one viewport at a time while a MutationObserver in
+the browser records every product card as it renders
+"""
+
+import time
+
+
+# Starts a fresh collection on every call: the card map is reset and the
+# selectors are replaced, so a page rendered client-side after a "next" click
+# doesn't inherit the previous page's cards. The observer itself is only
+# installed once per document. Cards are keyed by item id (or product link)
+# and their latest outerHTML is kept, so cards that fill in late or get
+# removed when scrolled out of view are not lost. If no selector matches more
+# than 5 cards the first selector that matched anything is used.
+INSTALL_OBSERVER_JS = """
+window.__darazCards = new Map();
+window.__darazSelectors = arguments[0];
+if (!window.__darazCollect) {
+    window.__darazCollect = function () {
+        let cards = [];
+        for (const selector of window.__darazSelectors) {
+            const found = document.querySelectorAll(selector);
+            if (found.length > 5) {
+                cards = found;
+                break;
+            }
+            if (found.length && !cards.length) cards = found;
+        }
+        for (const card of cards) {
+            const link = card.querySelector('a[href]');
+            const key = card.getAttribute('data-item-id')
+                || (link && link.getAttribute('href'))
+                || card.textContent.trim().slice(0, 200);
+            if (key) window.__darazCards.set(key, card.outerHTML);
+        }
+        return window.__darazCards.size;
+    };
+    let pending = false;
+    new MutationObserver(function () {
+        if (pending) return;
+        pending = true;
+        requestAnimationFrame(function () {
+            pending = false;
+            window.__darazCollect();
+        });
+    }).observe(document.body, {childList: true, subtree: true});
+}
+return window.__darazCollect();
+"""
+
+SCROLL_STEP_JS = """
+window.scrollBy(0, window.innerHeight);
+return [window.__darazCollect(),
+        window.innerHeight + window.scrollY >= document.body.scrollHeight - 2];
+"""
+
+CARDS_HTML_JS = """
+return '<div>' + Array.from(window.__darazCards.values()).join('') + '</div>';
+"""
+
+
+def collect_cards(driver, card_selectors, step_delay=0.3, stable_rounds=3, max_steps=60):
+    """
+    Scroll through the page and collect every product card
+
+    Stops once the bottom of the page is reached and the card count has not
+    changed for `stable_rounds` checks in a row.
+
+    Args:
+        driver: Selenium WebDriver instance
+        card_selectors: CSS selectors for product cards, in order of preference
+        step_delay: Seconds to wait after each scroll step
+        stable_rounds: Unchanged checks needed before stopping
+        max_steps: Maximum number of scroll steps
+
+    Returns:
+        HTML containing all collected cards, wrapped in a single <div>
+    """
+    driver.execute_script("window.scrollTo(0, 0);")
+    count = driver.execute_script(INSTALL_OBSERVER_JS, card_selectors)
+    stable = 0
+
+    for _ in range(max_steps):
+        time.sleep(step_delay)
+        new_count, at_bottom = driver.execute_script(SCROLL_STEP_JS)
+
+        if new_count == count and at_bottom:
+            stable += 1
+            if stable >= stable_rounds:
+                break
+        else:
+            stable = 0
+        count = new_count
+
+    print(f"Collected {count} cards while scrolling")
+    return driver.execute_script(CARDS_HTML_JS)
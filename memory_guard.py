@@ -0,0 +1,301 @@
+"""
+Memory Guard for Chrome drivers
+Samples browser memory, recycles tabs/drivers that grow too large and caps
+how many drivers run at the same time
+"""
+
+import threading
+import tempfile
+import time
+import os
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# Memory limit per driver (PSS of chromedriver + all Chrome processes) in MB
+DRIVER_MEMORY_LIMIT_MB = int(os.environ.get('DRIVER_MEMORY_LIMIT_MB', '700'))
+
+# Memory kept free for Python/Streamlit when packing drivers into the container
+RESERVED_MEMORY_MB = int(os.environ.get('RESERVED_MEMORY_MB', '400'))
+
+# State shared by every process in the container (Streamlit app and scheduler)
+SHARED_STATE_DIR = os.environ.get('SHARED_STATE_DIR', os.path.join(tempfile.gettempdir(), 'daraz-scraper'))
+
+
+def _read_int(path):
+    """Read a number from a file, None if missing or not a number"""
+    try:
+        with open(path) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def container_memory_mb():
+    """
+    Memory available to this container in MB
+
+    Uses the cgroup limit (v2 then v1) and falls back to the machine's total
+    memory when there is no limit.
+    """
+    total = None
+    if psutil:
+        total = psutil.virtual_memory().total
+    else:
+        try:
+            with open('/proc/meminfo') as f:
+                for line in f:
+                    if line.startswith('MemTotal:'):
+                        total = int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            pass
+
+    for path in ['/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes']:
+        limit = _read_int(path)
+        if limit and (total is None or limit < total):
+            total = limit
+            break
+
+    if total is None:
+        return None
+    return total // (1024 * 1024)
+
+
+def max_concurrent_drivers(limit_mb=DRIVER_MEMORY_LIMIT_MB):
+    """
+    How many drivers fit in the container at once
+
+    Can be forced with the MAX_CONCURRENT_DRIVERS environment variable.
+    """
+    forced = os.environ.get('MAX_CONCURRENT_DRIVERS')
+    if forced:
+        return max(1, int(forced))
+
+    available = container_memory_mb()
+    if available is None:
+        return 1
+    return max(1, (available - RESERVED_MEMORY_MB) // limit_mb)
+
+
+class DriverSlots:
+    """
+    Limit on running drivers shared across processes
+
+    Each slot is a lock file in SHARED_STATE_DIR held with flock, so the
+    Streamlit app and the scheduler draw from the same budget. The OS drops
+    the lock if a process dies. Without fcntl (Windows) it falls back to a
+    semaphore for this process only.
+    """
+
+    def __init__(self, count, directory=SHARED_STATE_DIR):
+        self.count = count
+        self.directory = directory
+        self.semaphore = threading.BoundedSemaphore(count)
+
+    def _try_lock_file(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for index in range(self.count):
+            slot = open(os.path.join(self.directory, f"driver-slot-{index}.lock"), "w")
+            try:
+                fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return slot
+            except OSError:
+                slot.close()
+        return None
+
+    def acquire(self, blocking=True, poll=0.5):
+        """
+        Take a slot
+
+        Returns:
+            Slot to pass to release(), or None if blocking is False and no slot is free
+        """
+        if fcntl is None:
+            return self if self.semaphore.acquire(blocking) else None
+
+        while True:
+            slot = self._try_lock_file()
+            if slot or not blocking:
+                return slot
+            time.sleep(poll)
+
+    def release(self, slot):
+        """Give a slot back"""
+        if fcntl is None:
+            self.semaphore.release()
+            return
+        fcntl.flock(slot, fcntl.LOCK_UN)
+        slot.close()
+
+
+# Shared by every scrape in every process of the container
+driver_slots = DriverSlots(max_concurrent_drivers())
+
+
+def _child_pids_proc(root_pid):
+    """Find all descendants of a process by scanning /proc"""
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The process name is in parentheses and may contain spaces
+        fields = stat[stat.rfind(')') + 2:].split()
+        parents.setdefault(int(fields[1]), []).append(int(entry))
+
+    pids = []
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(parents.get(pid, []))
+    return pids
+
+
+def _pss_proc(pid):
+    """PSS of a single process in bytes from /proc (RSS on kernels without smaps_rollup)"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _pss_psutil(process):
+    """PSS of a single process in bytes (USS or RSS where PSS isn't available)"""
+    try:
+        info = process.memory_full_info()
+        return getattr(info, 'pss', None) or info.uss
+    except psutil.AccessDenied:
+        return process.memory_info().rss
+
+
+def process_tree_memory_mb(root_pid):
+    """
+    Total memory of a process and all its children in MB
+
+    Uses PSS, which splits shared pages (libraries, shared memory) between
+    the processes using them. Summing RSS would count them once per Chrome
+    process and overstate the total several times over.
+
+    Args:
+        root_pid: PID of the root process (chromedriver)
+
+    Returns:
+        Memory in MB, 0 if the process is gone
+    """
+    if psutil:
+        try:
+            root = psutil.Process(root_pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return 0
+        total = 0
+        for process in processes:
+            try:
+                total += _pss_psutil(process)
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+    if not os.path.exists('/proc'):
+        return 0
+    return sum(_pss_proc(pid) for pid in _child_pids_proc(root_pid)) / (1024 * 1024)
+
+
+def driver_memory_mb(driver):
+    """Memory of a driver's chromedriver process tree in MB"""
+    try:
+        return process_tree_memory_mb(driver.service.process.pid)
+    except Exception:
+        return 0
+
+
+def wait_for_memory(driver, limit_mb, timeout=5, interval=0.5):
+    """
+    Poll a driver's memory until it drops to limit_mb or timeout runs out
+
+    Chrome tears down a closed tab's renderer asynchronously, so memory
+    measured right after closing a tab is usually still high.
+
+    Returns:
+        Last measured memory in MB
+    """
+    deadline = time.time() + timeout
+    memory = driver_memory_mb(driver)
+    while memory > limit_mb and time.time() < deadline:
+        time.sleep(interval)
+        memory = driver_memory_mb(driver)
+    return memory
+
+
+def recycle_tab(driver):
+    """
+    Replace the current tab with a fresh one
+
+    Closing the old tab lets Chrome drop its renderer process and heap.
+    """
+    old_handle = driver.current_window_handle
+    driver.switch_to.new_window('tab')
+    new_handle = driver.current_window_handle
+    driver.switch_to.window(old_handle)
+    driver.close()
+    driver.switch_to.window(new_handle)
+
+
+def recycle_if_needed(driver, create_driver, limit_mb=DRIVER_MEMORY_LIMIT_MB):
+    """
+    Recycle the tab, or the whole driver, if it uses more than limit_mb
+
+    The caller is responsible for loading the page it wants next; the
+    returned driver is left on a blank tab when it was recycled.
+
+    Args:
+        driver: Selenium WebDriver instance
+        create_driver: Function that returns a new driver
+        limit_mb: Memory limit in MB
+
+    Returns:
+        Tuple (driver, recycled) with the driver to keep using
+    """
+    memory = driver_memory_mb(driver)
+    if memory <= limit_mb:
+        return driver, False
+
+    print(f"Browser using {memory:.0f} MB (limit {limit_mb} MB), recycling tab...")
+    try:
+        recycle_tab(driver)
+        memory = wait_for_memory(driver, limit_mb)
+        if memory <= limit_mb:
+            return driver, True
+    except Exception as e:
+        print(f"Error recycling tab: {e}")
+
+    print(f"Browser still using {memory:.0f} MB, restarting driver...")
+    try:
+        driver.quit()
+    except Exception:
+        pass
+    return create_driver(), True
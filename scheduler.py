@@ -0,0 +1,176 @@
+"""
+Watchlist Scheduler
+Long-running process that re-checks saved queries on a schedule and writes
+results to the shared store (store.py) that the Streamlit app reads
+
+Usage:
+    python scheduler.py add "facewash" --sites np pk --every 60 --jitter 5
+    python scheduler.py list
+    python scheduler.py remove 3
+    python scheduler.py run
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from scraper import scrape_daraz, ScrapeError
+from sites import SITES, DEFAULT_SITE
+import threading
+import argparse
+import random
+import signal
+import store
+import os
+
+
+# Scrapes allowed at the same time on each site
+SITE_CONCURRENCY = int(os.environ.get('SITE_CONCURRENCY', '1'))
+
+# Seconds between checks for due watchlists
+POLL_SECONDS = int(os.environ.get('SCHEDULER_POLL_SECONDS', '30'))
+
+
+def next_run_time(watchlist):
+    """Next run: the interval plus a random jitter so runs don't line up"""
+    jitter = random.uniform(0, watchlist["jitter_minutes"])
+    return datetime.now() + timedelta(minutes=watchlist["interval_minutes"] + jitter)
+
+
+class Scheduler:
+    """
+    Runs due watchlists with a concurrency budget per site
+
+    Each watchlist is split into one job per site. A job waits for its
+    site's budget, scrapes incrementally (stopping once a page only has
+    products already stored with the same price and sold count) and saves
+    what changed.
+    """
+
+    def __init__(self, site_concurrency=SITE_CONCURRENCY, poll_seconds=POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.site_budgets = {key: threading.Semaphore(site_concurrency) for key in SITES}
+        self.executor = ThreadPoolExecutor(max_workers=site_concurrency * len(SITES))
+        self.running = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def run_job(self, watchlist, site_key, remaining):
+        """Scrape one site for one watchlist"""
+        query = watchlist["query"]
+        try:
+            with self.site_budgets[site_key]:
+                started_at = store.now()
+                known = store.known_products(query, site_key)
+
+                def stop_when_known(page_products):
+                    return all(
+                        known.get(store.product_key(product)) == (product['price'], product['sold'])
+                        for product in page_products
+                    )
+
+                print(f"[watchlist {watchlist['id']}] Scraping '{query}' on {site_key}...")
+                status, error = "ok", None
+                try:
+                    results = scrape_daraz(
+                        query,
+                        max_results=1000,
+                        max_pages=watchlist["max_pages"],
+                        site=site_key,
+                        stop_when_known=stop_when_known,
+                        raise_on_failure=True
+                    )
+                except ScrapeError as e:
+                    # Keep what was found before the failure, but record the run as failed
+                    results, status, error = e.results, "failed", str(e)
+
+                new_count, changed_count = store.save_products(query, site_key, results)
+                store.record_run(watchlist["id"], site_key, started_at, len(results), new_count, changed_count,
+                                 status, error)
+                print(f"[watchlist {watchlist['id']}] {site_key}: {status}, {len(results)} products, "
+                      f"{new_count} new, {changed_count} changed" + (f" ({error})" if error else ""))
+        except Exception as e:
+            print(f"[watchlist {watchlist['id']}] Error scraping {site_key}: {e}")
+        finally:
+            with self.lock:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    self.running.discard(watchlist["id"])
+
+    def dispatch_due(self):
+        """Start jobs for every watchlist that is due and not already running"""
+        for watchlist in store.due_watchlists():
+            with self.lock:
+                if watchlist["id"] in self.running:
+                    continue
+                self.running.add(watchlist["id"])
+
+            store.schedule_watchlist(watchlist["id"], next_run_time(watchlist))
+
+            sites = [key for key in watchlist["sites"] if key in SITES]
+            if not sites:
+                print(f"[watchlist {watchlist['id']}] No valid sites, skipping")
+                with self.lock:
+                    self.running.discard(watchlist["id"])
+                continue
+
+            remaining = [len(sites)]
+            for site_key in sites:
+                self.executor.submit(self.run_job, watchlist, site_key, remaining)
+
+    def run(self):
+        """Check for due watchlists until stopped"""
+        print(f"Scheduler started (checking every {self.poll_seconds}s)")
+        while not self.stop_event.is_set():
+            try:
+                self.dispatch_due()
+            except Exception as e:
+                print(f"Error checking watchlists: {e}")
+            self.stop_event.wait(self.poll_seconds)
+
+        # Queued jobs are dropped (they run again at their next due time);
+        # only scrapes already in progress are finished
+        print("Scheduler stopping, waiting for running scrapes...")
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def stop(self, *args):
+        self.stop_event.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-check saved Daraz queries on a schedule")
+    commands = parser.add_subparsers(dest="command")
+
+    add = commands.add_parser("add", help="Add a watchlist")
+    add.add_argument("query", help="Product to search for")
+    add.add_argument("--sites", nargs="+", default=[DEFAULT_SITE], choices=list(SITES), help="Daraz sites")
+    add.add_argument("--pages", type=int, default=3, help="Maximum pages per run")
+    add.add_argument("--every", type=int, default=60, help="Minutes between runs")
+    add.add_argument("--jitter", type=int, default=5, help="Random extra delay, up to this many minutes")
+
+    commands.add_parser("list", help="List watchlists")
+
+    remove = commands.add_parser("remove", help="Remove a watchlist")
+    remove.add_argument("id", type=int, help="Watchlist id")
+
+    commands.add_parser("run", help="Run the scheduler (default)")
+
+    args = parser.parse_args()
+
+    if args.command == "add":
+        watchlist_id = store.add_watchlist(args.query, args.sites, args.pages, args.every, args.jitter)
+        print(f"Added watchlist {watchlist_id}")
+    elif args.command == "list":
+        for watchlist in store.list_watchlists():
+            print(f"{watchlist['id']}: '{watchlist['query']}' on {','.join(watchlist['sites'])} "
+                  f"every {watchlist['interval_minutes']}m, next run {watchlist['next_run']}")
+    elif args.command == "remove":
+        store.remove_watchlist(args.id)
+        print(f"Removed watchlist {args.id}")
+    else:
+        scheduler = Scheduler()
+        signal.signal(signal.SIGTERM, scheduler.stop)
+        signal.signal(signal.SIGINT, scheduler.stop)
+        scheduler.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 """
-Simple Web Scraper for Daraz.com.np
+Simple Web Scraper for Daraz (Nepal, Pakistan, Sri Lanka, Bangladesh)
 This file contains the scraping functions to extract product information
 """
 
@@ -10,210 +10,356 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
+from fetch_policy import FetchPolicy, OUTCOME_OK, OUTCOME_EMPTY, OUTCOME_BLOCKED, OUTCOME_CRASH
+from memory_guard import driver_slots, recycle_if_needed
+from snapshots import SnapshotRecorder, HtmlPage
+from extraction import extract_products_from_page
+from lazy_load import collect_cards
+from sites import DEFAULT_SITE, get_site, search_url as build_search_url, normalize_product
+from store import product_key
+from concurrent.futures import ThreadPoolExecutor
+import queue
 import time
 import re
+import os
+import glob
 
 
-def extract_products_from_page(driver):
+class ScrapeError(Exception):
     """
-    Extract products from the current page
+    Raised by scrape_daraz(raise_on_failure=True) when a scrape failed
+    (error, block, crash) rather than simply finding nothing
+    
+    The products found before the failure are kept in `results`.
+    """
+    
+    def __init__(self, message, results=None):
+        super().__init__(message)
+        self.results = results or []
+
+
+def load_lazy_cards(driver, site=None):
+    """
+    Scroll through the current page and collect lazy-loaded cards
+    
+    Scrolls the page in viewport steps and collects cards as they render.
+    The result can be passed to extract_products_from_page (and saved as a
+    snapshot) in place of the driver.
     
     Args:
         driver: Selenium WebDriver instance
+        site: Site definition from sites.py (default: Daraz Nepal)
         
     Returns:
-        List of dictionaries with product info (name, price, sold)
+        HtmlPage holding the collected cards, or the driver itself if collecting failed
     """
-    products = []
-    
-    # Find product containers on the page
-    product_selectors = [
-        "div[data-qa-locator='product-item']",
-        "div.box--ujueT",
-        ".ant-col-xs-24",
-        "div[class*='box--']",
-        ".ant-col"
-    ]
-    
-    # Try to find products using different selectors
-    product_elements = []
-    for selector in product_selectors:
-        try:
-            product_elements = driver.find_elements(By.CSS_SELECTOR, selector)
-            if len(product_elements) > 5:
-                break
-        except:
-            continue
+    site = site or get_site(DEFAULT_SITE)
+    try:
+        cards_html = collect_cards(driver, site["product_selectors"])
+    except Exception as e:
+        print(f"Error collecting cards while scrolling: {e}")
+        return driver
     
-    # Extract information from each product
-    for product in product_elements:
-        try:
-            # Extract product name
-            name = None
-            try:
-                name_elem = product.find_element(By.CSS_SELECTOR, "a[title], .c16H9d, .c1Atzq")
-                name = name_elem.text.strip() or name_elem.get_attribute("title")
-            except:
-                try:
-                    links = product.find_elements(By.TAG_NAME, "a")
-                    for link in links:
-                        name = link.text.strip() or link.get_attribute("title")
-                        if name and len(name) > 10:
-                            break
-                except:
-                    pass
+    return HtmlPage(cards_html, driver.current_url)
+
+
+def build_page_url(current_url, page_number, page_param="page"):
+    """
+    Build the URL of a results page from the current URL
+    
+    Args:
+        current_url: URL of the page currently loaded
+        page_number: Page number to go to
+        page_param: Query parameter the site uses for the page number
+        
+    Returns:
+        URL with the page parameter set to page_number
+    """
+    if re.search(r'[?&](?:page|p)=\d+', current_url):
+        # Replace existing page number
+        return re.sub(r'([?&])(?:page|p)=\d+', f'\\1{page_param}={page_number}', current_url)
+    # Add page parameter
+    return current_url + ('&' if '?' in current_url else '?') + f'{page_param}={page_number}'
+
+
+def click_next_page(driver, site=None, settle=True):
+    """
+    Find and click the "next page" button
+    
+    Args:
+        driver: Selenium WebDriver instance
+        site: Site definition from sites.py (default: Daraz Nepal)
+        settle: Pause for the pagination to render before clicking; scroll
+            extraction turns this off, it has already scrolled through the page
+        
+    Returns:
+        True if a next page button was clicked
+    """
+    site = site or get_site(DEFAULT_SITE)
+    
+    # Scroll to bottom to ensure pagination is loaded
+    try:
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        if settle:
+            time.sleep(1.5)  # Reduced from 2 to 1.5 seconds
+    except:
+        return False
+    
+    # Try to find by text
+    try:
+        all_links = driver.find_elements(By.TAG_NAME, "a")
+        for link in all_links:
+            link_text = link.text.strip().lower()
+            link_aria = (link.get_attribute("aria-label") or "").lower()
+            link_class = (link.get_attribute("class") or "").lower()
             
-            # Extract price
-            price = None
-            try:
-                price_elem = product.find_element(By.CSS_SELECTOR, "[class*='price'], .c3gUW0")
-                price = price_elem.text.strip()
-            except:
-                # Try to find price in all text
+            # Check if link has "next" text/symbol and is not disabled
+            if (('next' in link_text or '>' in link_text or 'next' in link_aria) and 
+                'disabled' not in link_class):
                 try:
-                    all_text = product.text
-                    price_match = re.search(r'Rs\.?\s*[\d,]+|NPR\s*[\d,]+', all_text)
-                    if price_match:
-                        price = price_match.group(0)
+                    if link.is_displayed():
+                        driver.execute_script("arguments[0].scrollIntoView(true);", link)
+                        if settle:
+                            time.sleep(1)
+                        driver.execute_script("arguments[0].click();", link)
+                        return True
                 except:
-                    pass
-            
-            # Extract sold information
-            sold = "N/A"
+                    continue
+    except:
+        pass
+    
+    # Try CSS selectors
+    for selector in site["next_page_selectors"]:
+        try:
+            next_button = driver.find_element(By.CSS_SELECTOR, selector)
+            # Check if button is not disabled
+            button_class = next_button.get_attribute("class") or ""
+            parent_class = ""
             try:
-                sold_elem = product.find_element(By.CSS_SELECTOR, "[class*='sold']")
-                sold = sold_elem.text.strip()
+                parent = next_button.find_element(By.XPATH, "..")
+                parent_class = parent.get_attribute("class") or ""
             except:
-                try:
-                    all_text = product.text
-                    sold_match = re.search(r'(\d+\.?\d*[km]?\+?)\s*(sold|orders?)', all_text, re.IGNORECASE)
-                    if sold_match:
-                        sold = sold_match.group(0)
-                except:
-                    pass
+                pass
             
-            # Only add if we have name and price
-            if name and price:
-                products.append({
-                    'name': name,
-                    'price': price,
-                    'sold': sold
-                })
-        except Exception as e:
-            print(f"Error extracting product: {e}")
+            if 'disabled' not in button_class.lower() and 'disabled' not in parent_class.lower():
+                if next_button.is_displayed():
+                    # Scroll to button
+                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_button)
+                    if settle:
+                        time.sleep(1)
+                    
+                    # Try clicking
+                    try:
+                        next_button.click()
+                    except:
+                        driver.execute_script("arguments[0].click();", next_button)
+                    
+                    return True
+        except:
+            continue
+    
+    return False
+
+
+def first_card(driver, site):
+    """First product card on the current page, None if there is none"""
+    for selector in site["product_selectors"]:
+        try:
+            cards = driver.find_elements(By.CSS_SELECTOR, selector)
+        except:
             continue
+        if cards:
+            return cards[0]
+    return None
+
+
+def wait_for_new_page(driver, old_card, old_url, timeout=10):
+    """
+    Wait until a "next page" click has replaced the results
+    
+    Used by scroll extraction instead of a fixed sleep: waits for the old
+    page's first card to be removed (or, if it had none, for the URL to change).
+    """
+    def replaced(driver):
+        if old_card is not None:
+            return EC.staleness_of(old_card)(driver)
+        return driver.current_url != old_url
+    
+    try:
+        WebDriverWait(driver, timeout).until(replaced)
+    except TimeoutException:
+        print("Page did not change after clicking next, checking it anyway")
+
+
+def create_driver():
+    """
+    Create a headless Chrome driver
+    
+    Uses system Chromium for cloud deployments or ChromeDriverManager locally
+    
+    Returns:
+        Selenium WebDriver instance
+    """
+    # Setup Chrome browser
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')  # Run in background
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')  # Added for cloud deployment
+    chrome_options.add_argument('--window-size=1920,1080')
+    chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')  # Avoid detection
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    
+    print("Setting up Chrome browser...")
+    
+    # Try to use system Chromium (for cloud deployments) or fallback to ChromeDriverManager (for local)
+    # Check for environment variables first (Docker/Railway)
+    chrome_bin = os.environ.get('CHROME_BIN')
+    chromedriver_path = os.environ.get('CHROMEDRIVER_PATH')
+    
+    if chrome_bin and os.path.exists(chrome_bin):
+        print(f"Using Chrome from environment: {chrome_bin}")
+        chrome_options.binary_location = chrome_bin
+        
+        if chromedriver_path and os.path.exists(chromedriver_path):
+            print(f"Using ChromeDriver from environment: {chromedriver_path}")
+            service = Service(chromedriver_path)
+        else:
+            print("Using ChromeDriverManager")
+            service = Service(ChromeDriverManager().install())
+    else:
+        # Try to find system installations
+        chromium_paths = ['/usr/bin/chromium', '/usr/bin/chromium-browser', '/nix/store/*/bin/chromium']
+        chromedriver_paths = ['/usr/bin/chromedriver', '/nix/store/*/bin/chromedriver']
+
+        # Find chromium binary
+        binary = None
+        for path_pattern in chromium_paths:
+            if '*' in path_pattern:
+                # Handle wildcard paths (for Nix store)
+                matches = glob.glob(path_pattern)
+                if matches:
+                    binary = matches[0]
+                    break
+            elif os.path.exists(path_pattern):
+                binary = path_pattern
+                break
+        
+        # Find chromedriver
+        driver_path = None
+        for path_pattern in chromedriver_paths:
+            if '*' in path_pattern:
+                matches = glob.glob(path_pattern)
+                if matches:
+                    driver_path = matches[0]
+                    break
+            elif os.path.exists(path_pattern):
+                driver_path = path_pattern
+                break
+        
+        if binary:
+            print(f"Using system chromium: {binary}")
+            chrome_options.binary_location = binary
+            if driver_path:
+                print(f"Using chromedriver: {driver_path}")
+                service = Service(driver_path)
+            else:
+                print("Using ChromeDriverManager")
+                service = Service(ChromeDriverManager().install())
+        else:
+            # Local development - use ChromeDriverManager
+            print("Using ChromeDriverManager for local development")
+            service = Service(ChromeDriverManager().install())
     
-    return products
+    print("Initializing Chrome driver...")
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    driver.set_page_load_timeout(30)  # Add timeout
+    print("Chrome driver initialized successfully")
+    return driver
 
 
-def scrape_daraz(search_query, max_results=100, max_pages=6, progress_callback=None):
+def scrape_daraz(search_query, max_results=100, max_pages=6, progress_callback=None, save_snapshots=False,
+                 scroll_extract=False, site=DEFAULT_SITE, stop_when_known=None, raise_on_failure=False):
     """
-    Scrape Daraz.com.np for products across multiple pages
+    Scrape a Daraz site for products across multiple pages
     
     Args:
         search_query: Product to search for (e.g., "facewash")
         max_results: Maximum number of products to return (default: 50)
         max_pages: Maximum number of pages to scrape (default: 3)
         progress_callback: Optional callback function(page, total_pages, product_count, status)
+        save_snapshots: Save each page's HTML so extraction can be replayed later (see snapshots.py)
+        scroll_extract: Scroll through each page and collect lazy-loaded cards as they render
+            instead of waiting a fixed time and reading the page once
+        site: Site key from sites.py (default: "np")
+        stop_when_known: Optional function(page_products) that returns True when a page has
+            nothing new; paging stops there (used by the scheduler for incremental scrapes)
+        raise_on_failure: Raise ScrapeError instead of returning partial results when the
+            scrape failed (used by the scheduler to tell failed runs from empty ones)
     
     Returns:
-        List of product dictionaries
+        List of product dictionaries tagged with site, currency and numeric price_value
     """
+    site = get_site(site)
+    recorder = SnapshotRecorder(search_query, site["key"]) if save_snapshots else None
     driver = None
+    slot = None
     all_results = []
     seen_products = set()  # Track unique products to avoid duplicates
+    failure = None  # Why the scrape failed, if it did
+    
+    def report_status(message):
+        """Pass retry/pause messages from the fetch policy to the UI"""
+        if progress_callback:
+            progress_callback(0, max_pages, len(all_results), message)
+    
+    policy = FetchPolicy(status_callback=report_status)
+    
+    def load(url, ready_selector=None):
+        """Fetch a page, starting a new driver if the browser crashed"""
+        nonlocal driver
+        outcome = policy.fetch(driver, url, ready_selector)
+        restarts = 0
+        while outcome == OUTCOME_CRASH and policy.backoff(OUTCOME_CRASH, restarts):
+            print("Browser crashed, restarting driver...")
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            driver = None
+            driver = create_driver()
+            restarts += 1
+            outcome = policy.fetch(driver, url, ready_selector)
+        return outcome
     
     try:
-        # Setup Chrome browser
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')  # Run in background
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')  # Added for cloud deployment
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')  # Avoid detection
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
+        # Wait out a paused host before taking a browser slot
+        policy.breaker_for(site["base_url"]).wait(report_status)
+        
+        # Limit how many browsers run at once so the container doesn't run out of memory
+        slot = driver_slots.acquire(blocking=False)
+        if slot is None:
+            print("Waiting for a free browser slot...")
+            if progress_callback:
+                progress_callback(0, max_pages, 0, "Waiting for a free browser...")
+            slot = driver_slots.acquire()
         
-        print("Setting up Chrome browser...")
         if progress_callback:
             progress_callback(0, max_pages, 0, "Setting up browser...")
-        
-        # Try to use system Chromium (for cloud deployments) or fallback to ChromeDriverManager (for local)
-        import os
-        import glob
-        
-        # Check for environment variables first (Docker/Railway)
-        chrome_bin = os.environ.get('CHROME_BIN')
-        chromedriver_path = os.environ.get('CHROMEDRIVER_PATH')
-        
-        if chrome_bin and os.path.exists(chrome_bin):
-            print(f"Using Chrome from environment: {chrome_bin}")
-            chrome_options.binary_location = chrome_bin
-            
-            if chromedriver_path and os.path.exists(chromedriver_path):
-                print(f"Using ChromeDriver from environment: {chromedriver_path}")
-                service = Service(chromedriver_path)
-            else:
-                print("Using ChromeDriverManager")
-                service = Service(ChromeDriverManager().install())
-        else:
-            # Try to find system installations
-            chromium_paths = ['/usr/bin/chromium', '/usr/bin/chromium-browser', '/nix/store/*/bin/chromium']
-            chromedriver_paths = ['/usr/bin/chromedriver', '/nix/store/*/bin/chromedriver']
-
-            # Find chromium binary
-            binary = None
-            for path_pattern in chromium_paths:
-                if '*' in path_pattern:
-                    # Handle wildcard paths (for Nix store)
-                    matches = glob.glob(path_pattern)
-                    if matches:
-                        binary = matches[0]
-                        break
-                elif os.path.exists(path_pattern):
-                    binary = path_pattern
-                    break
-            
-            # Find chromedriver
-            driver_path = None
-            for path_pattern in chromedriver_paths:
-                if '*' in path_pattern:
-                    matches = glob.glob(path_pattern)
-                    if matches:
-                        driver_path = matches[0]
-                        break
-                elif os.path.exists(path_pattern):
-                    driver_path = path_pattern
-                    break
-            
-            if binary:
-                print(f"Using system chromium: {binary}")
-                chrome_options.binary_location = binary
-                if driver_path:
-                    print(f"Using chromedriver: {driver_path}")
-                    service = Service(driver_path)
-                else:
-                    print("Using ChromeDriverManager")
-                    service = Service(ChromeDriverManager().install())
-            else:
-                # Local development - use ChromeDriverManager
-                print("Using ChromeDriverManager for local development")
-                service = Service(ChromeDriverManager().install())
-        
-        print("Initializing Chrome driver...")
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.set_page_load_timeout(30)  # Add timeout
-        print("Chrome driver initialized successfully")
+        driver = create_driver()
         
         # Go to Daraz homepage
-        print("Opening Daraz.com.np...")
+        print(f"Opening {site['name']}...")
         if progress_callback:
-            progress_callback(0, max_pages, 0, "Opening Daraz.com.np...")
+            progress_callback(0, max_pages, 0, f"Opening {site['name']}...")
         
-        driver.get("https://www.daraz.com.np")
+        outcome = load(site["base_url"])
+        if outcome == OUTCOME_BLOCKED:
+            raise Exception("Daraz is blocking requests right now, try again later")
         time.sleep(2)  # Reduced from 3 to 2 seconds
         
         # Find search box and enter query
@@ -224,15 +370,7 @@ def scrape_daraz(search_query, max_results=100, max_pages=6, progress_callback=N
         search_box = None
         
         # Try different selectors to find search box
-        search_selectors = [
-            "input[placeholder*='Search']",
-            "input[type='search']",
-            "input[name='q']",
-            "#q",
-            "input.search-box__input"
-        ]
-        
-        for selector in search_selectors:
+        for selector in site["search_selectors"]:
             try:
                 print(f"Trying selector: {selector}")
                 search_box = WebDriverWait(driver, 5).until(
@@ -245,6 +383,8 @@ def scrape_daraz(search_query, max_results=100, max_pages=6, progress_callback=N
                 print(f"Selector {selector} failed: {str(e)[:50]}")
                 continue
         
+        search_url = build_search_url(site, search_query)
+        
         if not search_box:
             print("ERROR: Could not find search box with any selector!")
             print("Trying direct URL method as fallback...")
@@ -252,10 +392,8 @@ def scrape_daraz(search_query, max_results=100, max_pages=6, progress_callback=N
                 progress_callback(0, max_pages, 0, "Using direct search URL...")
             
             # Fallback: Go directly to search results URL
-            search_url = f"https://www.daraz.com.np/catalog/?q={search_query.replace(' ', '+')}"
             print(f"Navigating to: {search_url}")
-            driver.get(search_url)
-            time.sleep(3)
+            outcome = load(search_url, site["results_selector"])
         else:
             # Enter search query and submit
             print(f"Entering search query: {search_query}")
@@ -271,23 +409,25 @@ def scrape_daraz(search_query, max_results=100, max_pages=6, progress_callback=N
             except Exception as e:
                 print(f"Error entering search query: {e}")
                 raise Exception(f"Failed to enter search query: {str(e)}")
+            
+            # Wait for search results to load
+            print("Waiting for results...")
+            if progress_callback:
+                progress_callback(1, max_pages, 0, "Loading search results...")
+            
+            outcome = policy.check(driver, site["results_selector"])
+            if outcome != OUTCOME_OK:
+                print(f"Search results {outcome}, loading search URL instead...")
+                outcome = load(search_url, site["results_selector"])
         
-        # Wait for search results to load
-        print("Waiting for results...")
-        if progress_callback:
-            progress_callback(1, max_pages, 0, "Loading search results...")
-        
-        try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div[class*='grid'], div[class*='product'], .ant-row"))
-            )
-            print("Search results loaded successfully")
-        except Exception as e:
-            print(f"Warning: Timeout waiting for results. Trying to continue anyway... {e}")
-            # Take a screenshot for debugging if needed
-            # driver.save_screenshot("debug_screenshot.png")
+        if outcome in (OUTCOME_BLOCKED, OUTCOME_CRASH):
+            raise Exception(f"Search results page {outcome}")
+        if outcome != OUTCOME_OK:
+            print(f"Warning: search results page {outcome}. Trying to continue anyway...")
         
-        time.sleep(2)  # Reduced from 3 to 2 seconds
+        # Scroll extraction waits for the cards itself
+        if not scroll_extract:
+            time.sleep(2)  # Reduced from 3 to 2 seconds
         
         # Scrape pages
         page_number = 1
@@ -298,22 +438,34 @@ def scrape_daraz(search_query, max_results=100, max_pages=6, progress_callback=N
             if progress_callback:
                 progress_callback(page_number, max_pages, len(all_results), f"Scraping page {page_number}...")
             
+            # In scroll mode extraction (and the snapshot) use the cards collected while scrolling
+            page = load_lazy_cards(driver, site) if scroll_extract else driver
+            
+            if recorder:
+                recorder.record(page, page_number)
+            
             # Extract products from current page
-            page_products = extract_products_from_page(driver)
+            page_products = extract_products_from_page(page, site)
+            page_products = [normalize_product(product, site) for product in page_products]
             
             # Add unique products to results
             for product in page_products:
-                # Create unique key from name and price
-                product_key = (product['name'].strip().lower(), product['price'].strip())
+                # Same key as the result store: item id, then link, then name + price
+                key = product_key(product)
                 
-                if product_key not in seen_products:
-                    seen_products.add(product_key)
+                if key not in seen_products:
+                    seen_products.add(key)
                     all_results.append(product)
                     
                     # Update progress with new product count
                     if progress_callback and len(all_results) % 5 == 0:  # Update every 5 products
                         progress_callback(page_number, max_pages, len(all_results), f"Found {len(all_results)} products...")
             
+            # Incremental scrape: nothing new or changed on this page, so later pages are old too
+            if stop_when_known and page_products and stop_when_known(page_products):
+                print(f"Page {page_number} has no new or changed products, stopping")
+                break
+            
             # Safety check: if we have too many products, stop (but this shouldn't happen often)
             if len(all_results) >= max_results:
                 print(f"Reached max_results limit: {len(all_results)}")
@@ -321,155 +473,137 @@ def scrape_daraz(search_query, max_results=100, max_pages=6, progress_callback=N
             
             # Try to go to next page
             if page_number < max_pages:
-                next_page_found = False
-                try:
-                    # Wait a bit for page to fully load
-                    time.sleep(1.5)  # Reduced from 2 to 1.5 seconds
-                    
-                    # Scroll to bottom to ensure pagination is loaded
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(1.5)  # Reduced from 2 to 1.5 seconds
-                    
-                    # Try multiple methods to find next page button
-                    next_selectors = [
-                        "li.ant-pagination-next:not(.ant-pagination-disabled) a",
-                        "a[aria-label='Next Page']",
-                        "a[aria-label='next']",
-                        ".ant-pagination-next:not(.ant-pagination-disabled) a",
-                        "li.ant-pagination-next a",
-                        "a[title='Next Page']",
-                        "a[title='next']",
-                        ".ant-pagination-next a",
-                        "li[class*='pagination-next']:not([class*='disabled']) a",
-                        "a[class*='next']"
-                    ]
-                    
-                    # Also try to find by text
-                    try:
-                        all_links = driver.find_elements(By.TAG_NAME, "a")
-                        for link in all_links:
-                            link_text = link.text.strip().lower()
-                            link_aria = (link.get_attribute("aria-label") or "").lower()
-                            link_class = (link.get_attribute("class") or "").lower()
-                            
-                            # Check if link has "next" text/symbol and is not disabled
-                            if (('next' in link_text or '>' in link_text or 'next' in link_aria) and 
-                                'disabled' not in link_class):
-                                try:
-                                    if link.is_displayed():
-                                        driver.execute_script("arguments[0].scrollIntoView(true);", link)
-                                        time.sleep(1)
-                                        driver.execute_script("arguments[0].click();", link)
-                                        next_page_found = True
-                                        break
-                                except:
-                                    continue
-                    except:
-                        pass
-                    
-                    # Try CSS selectors
-                    if not next_page_found:
-                        for selector in next_selectors:
-                            try:
-                                next_button = driver.find_element(By.CSS_SELECTOR, selector)
-                                # Check if button is not disabled
-                                button_class = next_button.get_attribute("class") or ""
-                                parent_class = ""
-                                try:
-                                    parent = next_button.find_element(By.XPATH, "..")
-                                    parent_class = parent.get_attribute("class") or ""
-                                except:
-                                    pass
-                                
-                                if 'disabled' not in button_class.lower() and 'disabled' not in parent_class.lower():
-                                    if next_button.is_displayed():
-                                        # Scroll to button
-                                        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_button)
-                                        time.sleep(1)
-                                        
-                                        # Try clicking
-                                        try:
-                                            next_button.click()
-                                        except:
-                                            driver.execute_script("arguments[0].click();", next_button)
-                                        
-                                        next_page_found = True
-                                        break
-                            except:
-                                continue
-                    
-                    # Alternative: Try to construct next page URL
-                    if not next_page_found:
-                        try:
-                            current_url = driver.current_url
-                            next_page_num = page_number + 1
-                            
-                            # Check if URL has page parameter
-                            if 'page=' in current_url or 'p=' in current_url:
-                                # Extract and replace page number
-                                import re
-                                page_match = re.search(r'[?&](?:page|p)=(\d+)', current_url)
-                                if page_match:
-                                    # Replace existing page number
-                                    new_url = re.sub(r'([?&])(?:page|p)=\d+', f'\\1page={next_page_num}', current_url)
-                                else:
-                                    # Add page parameter
-                                    new_url = current_url + ('&' if '?' in current_url else '?') + f'page={next_page_num}'
-                            else:
-                                # Add page parameter
-                                new_url = current_url + ('&' if '?' in current_url else '?') + f'page={next_page_num}'
-                            
-                            print(f"Trying URL method: {new_url}")
-                            driver.get(new_url)
-                            next_page_found = True
-                        except Exception as e:
-                            print(f"Error constructing URL: {e}")
+                current_url = driver.current_url
+                next_url = build_page_url(current_url, page_number + 1, site["page_param"])
+                
+                # Keep memory bounded: recycle the tab/driver and jump straight to the next page
+                driver, recycled = recycle_if_needed(driver, create_driver)
+                
+                if recycled:
+                    print(f"Resuming at page {page_number + 1}: {next_url}")
+                    outcome = load(next_url, site["page_ready_selector"])
+                else:
+                    # Scroll extraction already waited for the cards to settle, so it
+                    # skips the fixed sleeps and waits for the click to replace the page
+                    old_card = first_card(driver, site) if scroll_extract else None
+                    if not scroll_extract:
+                        # Wait a bit for page to fully load
+                        time.sleep(1.5)  # Reduced from 2 to 1.5 seconds
                     
-                    if next_page_found:
-                        # Wait for new page to load
+                    if click_next_page(driver, site, settle=not scroll_extract):
                         print(f"Navigating to page {page_number + 1}...")
-                        time.sleep(3)  # Reduced from 4 to 3 seconds
-                        
-                        # Wait for products to load on new page
-                        WebDriverWait(driver, 15).until(  # Reduced from 20 to 15 seconds
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "div[class*='grid'], div[class*='product'], .ant-row, .box--"))
-                        )
-                        time.sleep(2)  # Reduced from 3 to 2 seconds
-                        
-                        page_number += 1
-                        print(f"Successfully navigated to page {page_number}")
-                    else:
-                        print("No more pages found - cannot find next page button")
-                        break
-                        
-                except Exception as e:
-                    print(f"Error navigating to next page: {e}")
-                    # Try URL method as fallback
-                    try:
-                        current_url = driver.current_url
-                        next_page = page_number + 1
-                        if 'page=' in current_url:
-                            new_url = current_url.replace(f'page={page_number}', f'page={next_page}')
+                        if scroll_extract:
+                            wait_for_new_page(driver, old_card, current_url)
                         else:
-                            new_url = current_url + ('&' if '?' in current_url else '?') + f'page={next_page}'
-                        driver.get(new_url)
-                        time.sleep(3)  # Reduced from 4 to 3 seconds
-                        page_number += 1
-                        print(f"Used URL method to navigate to page {page_number}")
-                    except:
-                        print("Could not navigate to next page")
-                        break
+                            time.sleep(3)  # Reduced from 4 to 3 seconds
+                        outcome = policy.check(driver, site["page_ready_selector"])
+                        if outcome != OUTCOME_OK:
+                            print(f"Next page {outcome}, trying URL method: {next_url}")
+                            outcome = load(next_url, site["page_ready_selector"])
+                    else:
+                        print(f"Next page button not found, trying URL method: {next_url}")
+                        outcome = load(next_url, site["page_ready_selector"])
+                
+                if policy.should_abort():
+                    failure = f"Too many blocked/timed out page loads ({policy.summary()})"
+                    print(f"{failure}, stopping")
+                    break
+                
+                if outcome == OUTCOME_OK:
+                    # Scroll extraction waits for the cards itself
+                    if not scroll_extract:
+                        time.sleep(2)  # Reduced from 3 to 2 seconds
+                    page_number += 1
+                    print(f"Successfully navigated to page {page_number}")
+                else:
+                    print(f"Could not navigate to next page ({outcome})")
+                    # An empty page is the normal end of results; anything else cut the scrape short
+                    if outcome != OUTCOME_EMPTY:
+                        failure = f"Page {page_number + 1} {outcome}"
+                    break
             else:
                 break
         
         print(f"Scraping complete! Found {len(all_results)} products from {page_number} page(s)")
+        print(f"Page loads: {policy.summary()}")
+        if recorder:
+            print(f"Snapshots saved as run {recorder.run_id}")
         
     except Exception as e:
         print(f"Error during scraping: {e}")
+        failure = str(e)
     
     finally:
         # Close browser
         if driver:
             driver.quit()
+        if slot is not None:
+            driver_slots.release(slot)
+    
+    if failure and raise_on_failure:
+        raise ScrapeError(failure, all_results)
+    
+    return all_results
+
+
+def scrape_sites(search_query, sites=(DEFAULT_SITE,), max_results=100, max_pages=6, progress_callback=None, **kwargs):
+    """
+    Scrape several Daraz sites for the same query at the same time
+    
+    Each site runs scrape_daraz in its own thread; the number of browsers
+    actually open is still capped by the shared driver slots in memory_guard.
+    
+    Args:
+        search_query: Product to search for (e.g., "facewash")
+        sites: Site keys from sites.py (e.g., ["np", "pk"])
+        max_results: Maximum number of products per site
+        max_pages: Maximum number of pages per site
+        progress_callback: Optional callback function(page, total_pages, product_count, status),
+            always called from the calling thread
+        **kwargs: Passed on to scrape_daraz (save_snapshots, scroll_extract)
+    
+    Returns:
+        List of product dictionaries from all sites, tagged with site, currency and price_value
+    """
+    sites = list(sites)
+    if len(sites) == 1:
+        return scrape_daraz(search_query, max_results, max_pages, progress_callback, site=sites[0], **kwargs)
+    
+    # Worker threads only queue their progress; it is reported from this thread
+    # because UI callbacks (Streamlit) don't work from other threads
+    updates = queue.Queue()
+    
+    def site_callback(site_key):
+        def callback(page, total_pages, product_count, status):
+            updates.put((site_key, page, total_pages, product_count, status))
+        return callback
+    
+    with ThreadPoolExecutor(max_workers=len(sites)) as executor:
+        futures = {
+            site_key: executor.submit(
+                scrape_daraz, search_query, max_results, max_pages,
+                site_callback(site_key) if progress_callback else None,
+                site=site_key, **kwargs
+            )
+            for site_key in sites
+        }
+        
+        while True:
+            try:
+                site_key, page, total_pages, product_count, status = updates.get(timeout=0.2)
+                progress_callback(page, total_pages, product_count, f"[{get_site(site_key)['name']}] {status}")
+                continue
+            except queue.Empty:
+                pass
+            if all(future.done() for future in futures.values()):
+                break
+    
+    all_results = []
+    for site_key in sites:
+        try:
+            all_results.extend(futures[site_key].result())
+        except Exception as e:
+            print(f"Error scraping {site_key}: {e}")
     
+    print(f"Scraped {len(all_results)} products from {len(sites)} site(s)")
     return all_results
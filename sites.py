@@ -0,0 +1,158 @@
+"""
+Site Definitions for Daraz regions
+Everything that differs between Daraz sites (URL, currency, selectors,
+pagination) lives here as data, so the scraper itself stays the same
+"""
+
+from urllib.parse import quote_plus, urljoin
+import os
+import re
+
+
+# Selectors shared by all Daraz sites (they run the same storefront)
+COMMON_SITE_CONFIG = {
+    # Product card containers, in order of preference
+    "product_selectors": [
+        "div[data-qa-locator='product-item']",
+        "div.box--ujueT",
+        ".ant-col-xs-24",
+        "div[class*='box--']",
+        ".ant-col"
+    ],
+    # Fields inside a product card
+    "name_selector": "a[title], .c16H9d, .c1Atzq",
+    "price_selector": "[class*='price'], .c3gUW0",
+    "sold_selector": "[class*='sold']",
+    "link_selector": "a[href]",
+    # Item id in product URLs, e.g. /products/face-wash-i123456-s789.html
+    "item_id_pattern": r'-i(\d+)(?:-s\d+)?\.html',
+    # Search box on the homepage
+    "search_selectors": [
+        "input[placeholder*='Search']",
+        "input[type='search']",
+        "input[name='q']",
+        "#q",
+        "input.search-box__input"
+    ],
+    # Selector that shows the search results grid has rendered
+    "results_selector": "div[class*='grid'], div[class*='product'], .ant-row",
+    # Selector used to confirm a results page loaded after pagination
+    "page_ready_selector": "div[class*='grid'], div[class*='product'], .ant-row, .box--",
+    # Selectors for the "next page" button
+    "next_page_selectors": [
+        "li.ant-pagination-next:not(.ant-pagination-disabled) a",
+        "a[aria-label='Next Page']",
+        "a[aria-label='next']",
+        ".ant-pagination-next:not(.ant-pagination-disabled) a",
+        "li.ant-pagination-next a",
+        "a[title='Next Page']",
+        "a[title='next']",
+        ".ant-pagination-next a",
+        "li[class*='pagination-next']:not([class*='disabled']) a",
+        "a[class*='next']"
+    ],
+    # Search results URL, relative to base_url
+    "search_path": "/catalog/?q={query}",
+    # Query parameter used for the page number
+    "page_param": "page",
+}
+
+SITES = {
+    "np": {
+        **COMMON_SITE_CONFIG,
+        "name": "Daraz Nepal",
+        "base_url": "https://www.daraz.com.np",
+        "currency": "NPR",
+        "price_pattern": r'Rs\.?\s*[\d,]+(?:\.\d+)?|NPR\s*[\d,]+(?:\.\d+)?',
+    },
+    "pk": {
+        **COMMON_SITE_CONFIG,
+        "name": "Daraz Pakistan",
+        "base_url": "https://www.daraz.pk",
+        "currency": "PKR",
+        "price_pattern": r'Rs\.?\s*[\d,]+(?:\.\d+)?|PKR\s*[\d,]+(?:\.\d+)?',
+    },
+    "lk": {
+        **COMMON_SITE_CONFIG,
+        "name": "Daraz Sri Lanka",
+        "base_url": "https://www.daraz.lk",
+        "currency": "LKR",
+        "price_pattern": r'Rs\.?\s*[\d,]+(?:\.\d+)?|LKR\s*[\d,]+(?:\.\d+)?',
+    },
+    "bd": {
+        **COMMON_SITE_CONFIG,
+        "name": "Daraz Bangladesh",
+        "base_url": "https://www.daraz.com.bd",
+        "currency": "BDT",
+        "price_pattern": r'৳\s*[\d,]+(?:\.\d+)?|Tk\.?\s*[\d,]+(?:\.\d+)?|BDT\s*[\d,]+(?:\.\d+)?',
+    },
+}
+
+DEFAULT_SITE = "np"
+
+
+def get_site(key=DEFAULT_SITE):
+    """
+    Get a site definition by key
+
+    The base URL can be overridden with DARAZ_<KEY>_BASE_URL (for example
+    DARAZ_NP_BASE_URL=http://localhost:8001) to point a site at a local
+    fixture server, e.g. one serving tests/fixtures/<key>.
+
+    Args:
+        key: Site key ("np", "pk", "lk" or "bd")
+
+    Returns:
+        Dictionary with the site's settings, including its key
+    """
+    if key not in SITES:
+        raise ValueError(f"Unknown site '{key}', expected one of: {', '.join(SITES)}")
+
+    site = dict(SITES[key], key=key)
+    override = os.environ.get(f"DARAZ_{key.upper()}_BASE_URL")
+    if override:
+        site["base_url"] = override.rstrip("/")
+    return site
+
+
+def search_url(site, search_query):
+    """URL of the search results page for a query"""
+    return site["base_url"] + site["search_path"].format(query=quote_plus(search_query))
+
+
+def parse_price(price_text, site):
+    """
+    Turn a price string into a number
+
+    Args:
+        price_text: Price as shown on the site (e.g. "Rs. 1,299")
+        site: Site definition
+
+    Returns:
+        Price as a float, or None if no number was found
+    """
+    if not price_text:
+        return None
+
+    # Prefer the part that matches the site's currency format
+    match = re.search(site["price_pattern"], price_text)
+    text = match.group(0) if match else price_text
+
+    number = re.search(r'\d[\d,]*(?:\.\d+)?', text)
+    if not number:
+        return None
+    return float(number.group(0).replace(',', ''))
+
+
+def normalize_product(product, site):
+    """Tag a product with its site, add a numeric price and resolve its link and item id"""
+    link = product.get('link')
+    if link:
+        link = urljoin(site["base_url"] + "/", link)
+    item_id = re.search(site["item_id_pattern"], link) if link else None
+    product['link'] = link
+    product['item_id'] = item_id.group(1) if item_id else None
+    product['site'] = site["key"]
+    product['currency'] = site["currency"]
+    product['price_value'] = parse_price(product.get('price'), site)
+    return product
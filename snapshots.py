@@ -0,0 +1,236 @@
+"""
+HTML Snapshots for Daraz scrapes
+Saves every fetched page (gzip, content-addressed) and replays extraction
+over saved pages without opening a browser
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from selenium.common.exceptions import NoSuchElementException
+from extraction import extract_products_from_page, CSS_SELECTOR, TAG_NAME, XPATH
+from bs4 import BeautifulSoup
+from sites import get_site, normalize_product
+from store import product_key
+from datetime import datetime
+import hashlib
+import json
+import gzip
+import os
+import re
+
+
+# Where snapshots are stored
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', 'snapshots')
+
+
+class HtmlElement:
+    """
+    Read-only stand-in for a Selenium WebElement backed by BeautifulSoup
+
+    Supports the calls extract_products_from_page makes, so the same
+    extraction code runs on live pages and saved snapshots.
+    """
+
+    def __init__(self, node):
+        self.node = node
+
+    @property
+    def text(self):
+        return self.node.get_text("\n", strip=True)
+
+    def get_attribute(self, name):
+        value = self.node.get(name)
+        if isinstance(value, list):
+            return " ".join(value)
+        return value
+
+    def find_elements(self, by, value):
+        if by == CSS_SELECTOR:
+            nodes = self.node.select(value)
+        elif by == TAG_NAME:
+            nodes = self.node.find_all(value)
+        elif by == XPATH and value == "..":
+            nodes = [self.node.parent] if self.node.parent else []
+        else:
+            raise ValueError(f"Unsupported locator for snapshots: {by}")
+        return [HtmlElement(node) for node in nodes]
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(f"No element matches {value}")
+        return elements[0]
+
+
+class HtmlPage(HtmlElement):
+    """Stand-in for a Selenium driver holding a saved page"""
+
+    def __init__(self, html, url=None):
+        super().__init__(BeautifulSoup(html, "html.parser"))
+        self.page_source = html
+        self.current_url = url
+
+
+def snapshot_path(digest):
+    """Path of a snapshot file from its sha256 digest"""
+    return os.path.join(SNAPSHOT_DIR, "objects", digest[:2], f"{digest}.html.gz")
+
+
+def save_snapshot(html):
+    """
+    Save page HTML, compressed and named by its sha256
+
+    Args:
+        html: Page source
+
+    Returns:
+        sha256 hex digest of the HTML
+    """
+    data = html.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    path = snapshot_path(digest)
+
+    # Same content is only stored once
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    return digest
+
+
+def load_snapshot(digest):
+    """Load page HTML by its sha256 digest"""
+    with gzip.open(snapshot_path(digest), "rb") as f:
+        return f.read().decode("utf-8")
+
+
+class SnapshotRecorder:
+    """
+    Records the pages of one scrape
+
+    Each page is saved with save_snapshot and listed in a manifest
+    (runs/<run_id>.jsonl) so the run can be replayed in order.
+    """
+
+    def __init__(self, search_query, site_key="np"):
+        slug = re.sub(r'[^a-z0-9]+', '-', search_query.lower()).strip('-') or "query"
+        self.run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{site_key}_{slug}"
+        self.search_query = search_query
+        self.site_key = site_key
+        self.manifest_path = os.path.join(SNAPSHOT_DIR, "runs", f"{self.run_id}.jsonl")
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+
+    def record(self, driver, page_number):
+        """Save the page currently loaded in the driver (or an HtmlPage of collected cards)"""
+        try:
+            digest = save_snapshot(driver.page_source)
+            entry = {
+                "query": self.search_query,
+                "site": self.site_key,
+                "page": page_number,
+                "url": driver.current_url,
+                "sha256": digest,
+                "saved_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            with open(self.manifest_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            print(f"Error saving snapshot: {e}")
+
+
+def read_manifest(run_id):
+    """List the pages recorded for a run"""
+    path = os.path.join(SNAPSHOT_DIR, "runs", f"{run_id}.jsonl")
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def list_runs():
+    """List recorded run ids, oldest first"""
+    runs_dir = os.path.join(SNAPSHOT_DIR, "runs")
+    if not os.path.isdir(runs_dir):
+        return []
+    return sorted(name[:-len(".jsonl")] for name in os.listdir(runs_dir) if name.endswith(".jsonl"))
+
+
+def extract_snapshot(digest, site_key="np"):
+    """
+    Run product extraction on one saved page
+
+    Top level so it can be sent to worker processes, which only need the
+    HTML parser, not the browser stack.
+    """
+    site = get_site(site_key)
+    products = extract_products_from_page(HtmlPage(load_snapshot(digest)), site)
+    return [normalize_product(product, site) for product in products]
+
+
+def replay_snapshots(digests, workers=None, site_keys=None):
+    """
+    Run extraction over saved pages in parallel
+
+    Args:
+        digests: List of snapshot sha256 digests
+        workers: Number of worker processes (default: CPU count)
+        site_keys: Site of each snapshot (default: all "np")
+
+    Returns:
+        List of product lists, in the same order as digests
+    """
+    if not digests:
+        return []
+    site_keys = site_keys or ["np"] * len(digests)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(extract_snapshot, digests, site_keys, chunksize=4))
+
+
+def replay_run(run_id, workers=None):
+    """
+    Re-derive the results of a recorded scrape from its snapshots
+
+    Args:
+        run_id: Id of the recorded run
+        workers: Number of worker processes (default: CPU count)
+
+    Returns:
+        List of unique product dictionaries, like scrape_daraz returns
+    """
+    entries = read_manifest(run_id)
+    pages = replay_snapshots(
+        [entry["sha256"] for entry in entries],
+        workers,
+        [entry.get("site", "np") for entry in entries]
+    )
+
+    results = []
+    seen_products = set()
+    for page_products in pages:
+        for product in page_products:
+            key = product_key(product)
+            if key not in seen_products:
+                seen_products.add(key)
+                results.append(product)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import csv
+    import sys
+
+    parser = argparse.ArgumentParser(description="Replay extraction over saved Daraz snapshots")
+    parser.add_argument("run_id", nargs="?", help="Run to replay (lists runs if omitted)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    args = parser.parse_args()
+
+    if not args.run_id:
+        for run_id in list_runs():
+            print(run_id)
+        sys.exit(0)
+
+    products = replay_run(args.run_id, args.workers)
+    writer = csv.DictWriter(sys.stdout, fieldnames=["name", "price", "sold", "link", "item_id", "site", "currency", "price_value"])
+    writer.writeheader()
+    writer.writerows(products)
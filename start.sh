@@ -0,0 +1,22 @@
+#!/bin/sh
+# Start the Streamlit app and the watchlist scheduler in the same container,
+# so they share the result store (RESULTS_DB), the driver slots and the
+# circuit breaker state (SHARED_STATE_DIR). Set RUN_SCHEDULER=0 to run the
+# app alone.
+
+if [ "${RUN_SCHEDULER:-1}" != "0" ]; then
+    python scheduler.py run &
+    scheduler_pid=$!
+fi
+
+streamlit run app.py --server.port="${PORT:-8501}" --server.address=0.0.0.0 --server.headless=true &
+app_pid=$!
+
+# Pass stop signals on so the scheduler can finish its running scrapes
+trap 'kill -TERM $app_pid $scheduler_pid 2>/dev/null' TERM INT
+
+wait $app_pid
+if [ -n "$scheduler_pid" ]; then
+    kill -TERM $scheduler_pid 2>/dev/null
+    wait $scheduler_pid
+fi
@@ -0,0 +1,244 @@
+"""
+Result Store for watchlists
+SQLite database shared by the scheduler process and the Streamlit app
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+import sqlite3
+import os
+
+
+# Path of the shared database (must be on a volume both processes see if the
+# scheduler runs in its own container, see start.sh)
+RESULTS_DB = os.environ.get('RESULTS_DB', 'daraz_results.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watchlists (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    query TEXT NOT NULL,
+    sites TEXT NOT NULL,
+    max_pages INTEGER NOT NULL,
+    interval_minutes INTEGER NOT NULL,
+    jitter_minutes INTEGER NOT NULL DEFAULT 0,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    last_run TEXT,
+    next_run TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS products (
+    query TEXT NOT NULL,
+    site TEXT NOT NULL,
+    product_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    link TEXT,
+    price TEXT,
+    price_value REAL,
+    currency TEXT,
+    sold TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    last_changed TEXT NOT NULL,
+    PRIMARY KEY (query, site, product_key)
+);
+
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    watchlist_id INTEGER NOT NULL,
+    site TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    products INTEGER NOT NULL,
+    new_products INTEGER NOT NULL,
+    changed_products INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'ok',
+    error TEXT
+);
+"""
+
+
+def now():
+    """Current time as an ISO string (the format stored in the database)"""
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def product_key(product):
+    """
+    Key used to recognise the same listing across runs
+
+    Different sellers often list items under the same title, so the name
+    alone isn't enough: the item id from the product link is used, then the
+    link path, and only as a last resort the name together with the price.
+    """
+    if product.get('item_id'):
+        return f"id:{product['item_id']}"
+    if product.get('link'):
+        return f"url:{urlparse(product['link']).path}"
+    name = " ".join(product['name'].lower().split())
+    return f"name:{name}|{product['price'].strip()}"
+
+
+@contextmanager
+def connect(path=None):
+    """
+    Open the result store, creating tables if needed
+
+    WAL mode lets the app read while the scheduler writes.
+    """
+    conn = sqlite3.connect(path or RESULTS_DB, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def add_watchlist(query, sites, max_pages=3, interval_minutes=60, jitter_minutes=5):
+    """
+    Save a query to be re-checked on a schedule
+
+    Args:
+        query: Product to search for
+        sites: Site keys from sites.py
+        max_pages: Maximum pages per run (runs stop earlier once nothing changed)
+        interval_minutes: Minutes between runs
+        jitter_minutes: Random extra delay added to each run, up to this many minutes
+
+    Returns:
+        Id of the new watchlist
+    """
+    with connect() as conn:
+        cursor = conn.execute(
+            "INSERT INTO watchlists (query, sites, max_pages, interval_minutes, jitter_minutes, next_run) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (query, ",".join(sites), max_pages, interval_minutes, jitter_minutes, now())
+        )
+        return cursor.lastrowid
+
+
+def remove_watchlist(watchlist_id):
+    """Delete a watchlist"""
+    with connect() as conn:
+        conn.execute("DELETE FROM watchlists WHERE id = ?", (watchlist_id,))
+
+
+def list_watchlists():
+    """All watchlists as dictionaries"""
+    with connect() as conn:
+        rows = conn.execute("SELECT * FROM watchlists ORDER BY id").fetchall()
+    return [_watchlist(row) for row in rows]
+
+
+def due_watchlists():
+    """Enabled watchlists whose next run time has passed"""
+    with connect() as conn:
+        rows = conn.execute(
+            "SELECT * FROM watchlists WHERE enabled = 1 AND next_run <= ? ORDER BY next_run",
+            (now(),)
+        ).fetchall()
+    return [_watchlist(row) for row in rows]
+
+
+def schedule_watchlist(watchlist_id, next_run):
+    """Record that a watchlist ran now and set its next run time"""
+    with connect() as conn:
+        conn.execute(
+            "UPDATE watchlists SET last_run = ?, next_run = ? WHERE id = ?",
+            (now(), next_run.isoformat(timespec="seconds"), watchlist_id)
+        )
+
+
+def _watchlist(row):
+    watchlist = dict(row)
+    watchlist["sites"] = watchlist["sites"].split(",")
+    return watchlist
+
+
+def known_products(query, site):
+    """
+    Products stored for a query and site
+
+    Returns:
+        Dictionary of product_key -> (price, sold)
+    """
+    with connect() as conn:
+        rows = conn.execute(
+            "SELECT product_key, price, sold FROM products WHERE query = ? AND site = ?",
+            (query, site)
+        ).fetchall()
+    return {row["product_key"]: (row["price"], row["sold"]) for row in rows}
+
+
+def save_products(query, site, products):
+    """
+    Insert new products and update changed ones
+
+    Args:
+        query: Query the products were found with
+        site: Site key
+        products: Product dictionaries from scrape_daraz
+
+    Returns:
+        Tuple (new_count, changed_count)
+    """
+    known = known_products(query, site)
+    timestamp = now()
+    new_count = 0
+    changed_count = 0
+
+    with connect() as conn:
+        for product in products:
+            key = product_key(product)
+            current = (product['price'], product['sold'])
+
+            if key not in known:
+                new_count += 1
+                conn.execute(
+                    "INSERT OR IGNORE INTO products (query, site, product_key, name, link, price, price_value, "
+                    "currency, sold, first_seen, last_seen, last_changed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (query, site, key, product['name'], product.get('link'), product['price'],
+                     product.get('price_value'), product.get('currency'), product['sold'],
+                     timestamp, timestamp, timestamp)
+                )
+            elif known[key] != current:
+                changed_count += 1
+                conn.execute(
+                    "UPDATE products SET price = ?, price_value = ?, sold = ?, last_seen = ?, last_changed = ? "
+                    "WHERE query = ? AND site = ? AND product_key = ?",
+                    (product['price'], product.get('price_value'), product['sold'], timestamp, timestamp,
+                     query, site, key)
+                )
+            else:
+                conn.execute(
+                    "UPDATE products SET last_seen = ? WHERE query = ? AND site = ? AND product_key = ?",
+                    (timestamp, query, site, key)
+                )
+            known[key] = current
+
+    return new_count, changed_count
+
+
+def record_run(watchlist_id, site, started_at, products, new_products, changed_products,
+               status="ok", error=None):
+    """Save the summary of one scheduled scrape (status "ok" or "failed")"""
+    with connect() as conn:
+        conn.execute(
+            "INSERT INTO runs (watchlist_id, site, started_at, finished_at, products, new_products, "
+            "changed_products, status, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (watchlist_id, site, started_at, now(), products, new_products, changed_products, status, error)
+        )
+
+
+def load_products(query):
+    """All stored products for a query, most recently changed first"""
+    with connect() as conn:
+        rows = conn.execute(
+            "SELECT name, price, sold, site, currency, price_value, link, first_seen, last_seen, last_changed "
+            "FROM products WHERE query = ? ORDER BY last_changed DESC, name",
+            (query,)
+        ).fetchall()
+    return [dict(row) for row in rows]
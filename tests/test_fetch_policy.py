@@ -0,0 +1,127 @@
+from selenium.common.exceptions import TimeoutException
+import pytest
+
+import fetch_policy
+from fetch_policy import (
+    CircuitBreaker, FetchPolicy, is_blocked_page,
+    OUTCOME_OK, OUTCOME_BLOCKED, OUTCOME_TIMEOUT, OUTCOME_CRASH, classify_exception
+)
+from snapshots import HtmlPage
+
+
+# Retry rules without real delays
+FAST_RULES = {
+    OUTCOME_BLOCKED: (0.001, 0.001, 5),
+    OUTCOME_TIMEOUT: (0.001, 0.001, 3),
+}
+
+
+@pytest.fixture(autouse=True)
+def shared_state(tmp_path, monkeypatch):
+    """Keep breaker state out of the real SHARED_STATE_DIR"""
+    monkeypatch.setattr(fetch_policy, "SHARED_STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(fetch_policy, "_breakers", {})
+
+
+def page(html="<html><body></body></html>", url="https://www.daraz.pk/", title="Daraz"):
+    result = HtmlPage(html, url)
+    result.title = title
+    return result
+
+
+class TimeoutDriver:
+    def get(self, url):
+        raise TimeoutException("page load timed out")
+
+
+class BlockedDriver:
+    current_url = "https://www.daraz.pk/_____tmd_____/punish?x5secdata=abc"
+    title = ""
+
+    def get(self, url):
+        pass
+
+    def find_elements(self, by, value):
+        return []
+
+
+def test_breaker_trips_after_threshold_blocks():
+    breaker = CircuitBreaker(threshold=3, cooldown=60, host="www.daraz.pk")
+    for _ in range(2):
+        breaker.record(OUTCOME_BLOCKED)
+    assert not breaker.is_open()
+    breaker.record(OUTCOME_BLOCKED)
+    assert breaker.is_open()
+    assert 0 < breaker.remaining() <= 60
+
+
+def test_breaker_ignores_timeouts():
+    breaker = CircuitBreaker(threshold=3, cooldown=60, host="www.daraz.pk")
+    for _ in range(10):
+        breaker.record(OUTCOME_TIMEOUT)
+    assert not breaker.is_open()
+
+
+def test_breaker_resets_on_success():
+    breaker = CircuitBreaker(threshold=3, cooldown=60, host="www.daraz.pk")
+    breaker.record(OUTCOME_BLOCKED)
+    breaker.record(OUTCOME_BLOCKED)
+    breaker.record(OUTCOME_OK)
+    breaker.record(OUTCOME_BLOCKED)
+    assert not breaker.is_open()
+
+
+def test_breaker_pause_is_shared():
+    CircuitBreaker(threshold=1, cooldown=60, host="www.daraz.pk").record(OUTCOME_BLOCKED)
+    # A breaker in another process reads the same state file
+    assert CircuitBreaker(threshold=1, cooldown=60, host="www.daraz.pk").is_open()
+    assert not CircuitBreaker(threshold=1, cooldown=60, host="www.daraz.lk").is_open()
+
+
+def test_fetch_keeps_timeouts_as_timeouts():
+    policy = FetchPolicy(retry_rules=FAST_RULES)
+    assert policy.fetch(TimeoutDriver(), "https://www.daraz.pk/slow") == OUTCOME_TIMEOUT
+    assert policy.counts[OUTCOME_TIMEOUT] == 4
+    assert not policy.breaker_for("https://www.daraz.pk/").is_open()
+
+
+def test_fetch_stops_retrying_once_the_breaker_trips():
+    policy = FetchPolicy(retry_rules=FAST_RULES, breaker_threshold=3)
+    assert policy.fetch(BlockedDriver(), "https://www.daraz.pk/") == OUTCOME_BLOCKED
+    assert policy.counts[OUTCOME_BLOCKED] == 3
+    assert policy.breaker_for("https://www.daraz.pk/").is_open()
+
+    # Later loads of the paused host don't touch the browser
+    assert policy.fetch(TimeoutDriver(), "https://www.daraz.pk/other") == OUTCOME_BLOCKED
+
+
+def test_should_abort_on_mostly_failed_loads():
+    policy = FetchPolicy(abort_after=4, abort_rate=0.5)
+    policy.counts[OUTCOME_OK] = 1
+    policy.counts[OUTCOME_TIMEOUT] = 2
+    assert not policy.should_abort()
+    policy.counts[OUTCOME_BLOCKED] = 1
+    assert policy.should_abort()
+
+
+def test_normal_page_mentioning_captcha_is_not_blocked():
+    html = '<html><head><script>window.cfg = {"captcha": true, "denied": "access denied"}</script></head></html>'
+    assert not is_blocked_page(page(html))
+
+
+@pytest.mark.parametrize("url, title, html", [
+    ("https://www.daraz.pk/_____tmd_____/punish?x5secdata=abc", "", ""),
+    ("https://www.daraz.pk/", "Captcha Interception", ""),
+    ("https://www.daraz.pk/", "Daraz", '<div id="nc_1_n1z" class="nc_iconfont btn_slide"></div>'),
+])
+def test_blocked_pages(url, title, html):
+    assert is_blocked_page(page(html, url, title))
+
+
+@pytest.mark.parametrize("message, outcome", [
+    ("tab crashed", OUTCOME_CRASH),
+    ("invalid session id", OUTCOME_CRASH),
+    ("net::ERR_TIMED_OUT", OUTCOME_TIMEOUT),
+])
+def test_classify_exception(message, outcome):
+    assert classify_exception(Exception(message)) == outcome
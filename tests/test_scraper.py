@@ -0,0 +1,17 @@
+import pytest
+
+from scraper import build_page_url
+
+
+@pytest.mark.parametrize("current_url, page_number, expected", [
+    ("https://www.daraz.com.np/catalog/?q=soap", 2, "https://www.daraz.com.np/catalog/?q=soap&page=2"),
+    ("https://www.daraz.com.np/catalog/?q=soap&page=2", 3, "https://www.daraz.com.np/catalog/?q=soap&page=3"),
+    ("https://www.daraz.com.np/catalog/?page=4&q=soap", 5, "https://www.daraz.com.np/catalog/?page=5&q=soap"),
+    ("https://www.daraz.com.np/soap/", 2, "https://www.daraz.com.np/soap/?page=2"),
+])
+def test_build_page_url(current_url, page_number, expected):
+    assert build_page_url(current_url, page_number) == expected
+
+
+def test_build_page_url_custom_param():
+    assert build_page_url("https://example.com/search?q=soap&p=1", 2, "p") == "https://example.com/search?q=soap&p=2"
@@ -0,0 +1,65 @@
+import pytest
+
+from sites import SITES, get_site, normalize_product, parse_price, search_url
+
+
+@pytest.mark.parametrize("site_key, price_text, expected", [
+    ("np", "Rs. 1,299", 1299.0),
+    ("np", "NPR 345", 345.0),
+    ("pk", "Rs. 2,499.50", 2499.5),
+    ("pk", "PKR 899", 899.0),
+    ("lk", "Rs 850", 850.0),
+    ("lk", "LKR 12,000", 12000.0),
+    ("bd", "৳ 1,250", 1250.0),
+    ("bd", "Tk. 420", 420.0),
+    ("bd", "BDT 395", 395.0),
+])
+def test_parse_price_per_currency(site_key, price_text, expected):
+    assert parse_price(price_text, get_site(site_key)) == expected
+
+
+def test_parse_price_prefers_the_site_currency():
+    # Discounted cards show the price and the discount; the currency match wins
+    assert parse_price("-25% Rs. 1,050", get_site("np")) == 1050.0
+
+
+@pytest.mark.parametrize("price_text", [None, "", "Out of stock"])
+def test_parse_price_without_a_number(price_text):
+    assert parse_price(price_text, get_site("np")) is None
+
+
+def test_get_site_unknown_key():
+    with pytest.raises(ValueError):
+        get_site("in")
+
+
+def test_get_site_base_url_override(monkeypatch):
+    monkeypatch.setenv("DARAZ_PK_BASE_URL", "http://localhost:8002/")
+    site = get_site("pk")
+    assert site["base_url"] == "http://localhost:8002"
+    assert site["key"] == "pk"
+    assert SITES["pk"]["base_url"] == "https://www.daraz.pk"
+
+
+def test_search_url_encodes_the_query():
+    site = get_site("np")
+    assert search_url(site, "soap & shampoo #1") == "https://www.daraz.com.np/catalog/?q=soap+%26+shampoo+%231"
+
+
+def test_normalize_product_resolves_link_and_item_id():
+    product = normalize_product(
+        {'name': "Face Wash", 'price': "৳ 420", 'sold': "N/A",
+         'link': "//www.daraz.com.bd/products/face-wash-i400002-s4000020.html"},
+        get_site("bd")
+    )
+    assert product['link'] == "https://www.daraz.com.bd/products/face-wash-i400002-s4000020.html"
+    assert product['item_id'] == "400002"
+    assert product['site'] == "bd"
+    assert product['currency'] == "BDT"
+    assert product['price_value'] == 420.0
+
+
+def test_normalize_product_without_link():
+    product = normalize_product({'name': "Face Wash", 'price': "Rs. 345", 'sold': "N/A"}, get_site("np"))
+    assert product['link'] is None
+    assert product['item_id'] is None
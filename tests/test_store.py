@@ -0,0 +1,44 @@
+import pytest
+
+import store
+
+
+@pytest.fixture(autouse=True)
+def results_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "RESULTS_DB", str(tmp_path / "results.db"))
+
+
+def product(name, price, sold="N/A", item_id=None, link=None):
+    return {'name': name, 'price': price, 'sold': sold, 'item_id': item_id, 'link': link}
+
+
+def test_product_key_prefers_item_id_then_link_then_name():
+    link = "https://www.daraz.pk/products/face-wash-i200001-s2000010.html?spm=abc"
+    assert store.product_key(product("Face Wash", "Rs. 899", item_id="200001", link=link)) == "id:200001"
+    assert store.product_key(product("Face Wash", "Rs. 899", link=link)) == \
+        "url:/products/face-wash-i200001-s2000010.html"
+    assert store.product_key(product("  Face   WASH ", "Rs. 899 ")) == "name:face wash|Rs. 899"
+
+
+def test_save_products_counts_new_and_changed():
+    first = [
+        product("Face Wash", "Rs. 100", item_id="1"),
+        product("Face Wash", "Rs. 120", item_id="2"),
+    ]
+    assert store.save_products("face wash", "np", first) == (2, 0)
+    assert store.save_products("face wash", "np", first) == (0, 0)
+
+    second = [
+        product("Face Wash", "Rs. 90", item_id="1"),
+        product("Face Wash", "Rs. 120", item_id="2"),
+        product("Face Wash", "Rs. 150", item_id="3"),
+    ]
+    assert store.save_products("face wash", "np", second) == (1, 1)
+    assert store.known_products("face wash", "np")["id:1"] == ("Rs. 90", "N/A")
+
+
+def test_watchlists_are_due_once_added():
+    watchlist_id = store.add_watchlist("face wash", ["np", "pk"], interval_minutes=30)
+    due = store.due_watchlists()
+    assert [watchlist["id"] for watchlist in due] == [watchlist_id]
+    assert due[0]["sites"] == ["np", "pk"]
@@ -5,6 +5,7 @@ Modular components for better code organization
 
 import streamlit as st
 import pandas as pd
+from sites import SITES, DEFAULT_SITE
 
 
 def apply_custom_css():
@@ -41,7 +42,7 @@ def apply_custom_css():
 def render_header():
     """Render the app header"""
     st.markdown('<h1 class="main-header">🛍️ Daraz Product Scraper</h1>', unsafe_allow_html=True)
-    st.markdown('<p class="sub-header">Search and analyze products from Daraz.com.np</p>', unsafe_allow_html=True)
+    st.markdown('<p class="sub-header">Search and analyze products from Daraz</p>', unsafe_allow_html=True)
 
 
 def render_sidebar():
@@ -56,6 +57,15 @@ def render_sidebar():
             help="Enter the product you want to search for"
         )
         
+        # Sites to search
+        sites = st.multiselect(
+            "Daraz sites",
+            options=list(SITES),
+            default=[DEFAULT_SITE],
+            format_func=lambda key: SITES[key]["name"],
+            help="Selected sites are searched at the same time"
+        )
+        
         # Maximum pages
         max_pages = st.slider(
             "Number of pages to scrape",
@@ -85,7 +95,7 @@ def render_sidebar():
             - Download CSV for analysis
             """)
         
-    return search_query, max_pages, search_button
+    return search_query, sites, max_pages, search_button
 
 
 def render_statistics(results, max_pages):
@@ -139,6 +149,22 @@ def render_results_table(df):
             "sold": st.column_config.TextColumn(
                 "Sold",
                 width="small"
+            ),
+            "site": st.column_config.TextColumn(
+                "Site",
+                width="small"
+            ),
+            "currency": st.column_config.TextColumn(
+                "Currency",
+                width="small"
+            ),
+            "price_value": st.column_config.NumberColumn(
+                "Price (number)",
+                width="small"
+            ),
+            "link": st.column_config.LinkColumn(
+                "Link",
+                width="small"
             )
         },
         height=400
@@ -189,6 +215,28 @@ def render_welcome_screen():
         """)
 
 
+def render_watchlists(watchlists):
+    """Render scheduled watchlists and return the one selected"""
+    st.divider()
+    st.subheader("Watchlists")
+    st.caption("Queries re-checked by the scheduler (`python scheduler.py`)")
+    
+    selected = st.selectbox(
+        "Watchlist",
+        options=watchlists,
+        format_func=lambda w: f"{w['query']} ({', '.join(w['sites'])}, every {w['interval_minutes']} min)"
+    )
+    
+    if selected:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Last Run", selected['last_run'] or "Not yet")
+        with col2:
+            st.metric("Next Run", selected['next_run'])
+    
+    return selected
+
+
 def show_live_progress(current_page, total_pages, product_count):
     """Show live scraping progress"""
     progress = current_page / total_pages